@@ -2,9 +2,23 @@ from abc import ABC, abstractmethod
 from CSP.Variable import Variable
 
 class Constraint(ABC):
+    __slots__ = ('variables', 'var_set', 'unassigned_cnt')
 
     def __init__(self, variables: list[Variable]):
         self.variables = variables
+        self.var_set = set(variables)
+        self.unassigned_cnt = 0
+        for i, var in enumerate(variables):
+            var.watch(self, i)
+            if not var.has_value:
+                self.unassigned_cnt += 1
+
+    def notify(self, index: int, old, new):
+        """Called by variables[index] whenever its value changes from old to new."""
+        if old is None:
+            self.unassigned_cnt -= 1
+        elif new is None:
+            self.unassigned_cnt += 1
 
     @abstractmethod
     def is_satisfied(self) -> bool:
@@ -17,6 +31,7 @@ class SoftConstraint(ABC):
     but doesn't have to be satisfied for a valid solution.
     Used to guide the solver towards better solutions.
     """
+    __slots__ = ('variables', 'weight')
     
     def __init__(self, variables: list[Variable], weight: float = 1.0):
         self.variables = variables
@@ -21,12 +21,11 @@ class Problem(ABC):
         return None
 
     def calculate_neighbors(self):
+        for constraint in self.constraints:
+            for variable in constraint.variables:
+                variable.neighbors.update(constraint.var_set)
         for variable in self.variables:
-            for constraint in self.constraints:
-                if variable in constraint.variables:
-                    for other_var in constraint.variables: 
-                        if other_var is not variable:     
-                            variable.neighbors.add(other_var) 
+            variable.neighbors.discard(variable)
 
     def get_unassigned_variables(self) -> list[Variable]:
         return [x for x in self.variables if not x.has_value]
@@ -36,4 +35,4 @@ class Problem(ABC):
             print(f"{variable.name} is set to {variable.value}")
 
     def get_constraints(self, variable: Variable) -> List[Constraint]:
-        return [constraint for constraint in self.constraints if variable in constraint.variables]
+        return [constraint for constraint in self.constraints if variable in constraint.var_set]
@@ -1,9 +1,9 @@
 import os
 import subprocess
 import time
-from collections import deque
-from copy import deepcopy
-from typing import Optional, List, Set, Tuple
+from collections import OrderedDict, defaultdict, deque
+from functools import lru_cache
+from typing import Iterable, Optional, List, Tuple
 
 from CSP.Problem import Problem
 from CSP.Variable import Variable
@@ -19,24 +19,36 @@ class Solver:
             problem (Problem): The problem instance to be solved.
         """
         self.problem = problem
-        self.back_up = deque()
+        # Undo log for backtracking: None marks the start of a branch, (var, None) an
+        # assignment and (var, old_domain) a domain reduction. Domains are only ever
+        # replaced by filtered copies, so keeping the old list reference is enough to
+        # restore them; never snapshot Variables themselves, they reference the whole
+        # constraint graph through neighbors and watchers.
+        self.trail = []
+        self.unassigned = OrderedDict((v, None) for v in problem.variables if not v.has_value)
+        self.var_constraints = defaultdict(list)
+        for constraint in problem.constraints:
+            for variable in constraint.variables:
+                self.var_constraints[variable].append(constraint)
 
     def is_finished(self) -> bool:
         """
         Determines if the problem has been solved.
+        assign() checks every constraint as soon as its last variable is assigned,
+        and ac3() checks the ones over initial values only, so once nothing is left
+        unassigned all constraints hold.
 
         Returns:
             bool: True if the problem has been solved, False otherwise.
         """
-        return all([x.is_satisfied() for x in self.problem.constraints]) and len(
-            self.problem.get_unassigned_variables()) == 0
+        return not self.unassigned
 
     def solve(self):
         """
         Solves the problem instance using the backtracking algorithm with optional heuristics.
         """
         start = time.time()
-        result = self.backtracking()
+        result = self.ac3() and self.backtracking()
         end = time.time()
         time_elapsed = (end - start) * 1000
         if result:
@@ -44,6 +56,59 @@ class Solver:
         else:
             print(f'Failed to solve after {time_elapsed} ms')
 
+    def ac3(self) -> bool:
+        """
+        Implements the AC-3 algorithm as a preprocessing step: revises every
+        constraint and re-queues the constraints of any variable whose domain shrinks,
+        so the search starts from the reduced domains.
+
+        Returns:
+            bool: False if a domain became empty (no solution exists), True otherwise.
+        """
+        # Constraints whose variables all have initial values never go through assign()
+        if not all(constraint.is_satisfied() for constraint in self.problem.constraints
+                   if constraint.unassigned_cnt == 0):
+            return False
+
+        queue = deque(self.problem.constraints)
+        queued = set(queue)
+        while queue:
+            constraint = queue.popleft()
+            queued.discard(constraint)
+            for var in self.revise(constraint):
+                if not var.domain:
+                    return False
+                for other in self.var_constraints[var]:
+                    if other is not constraint and other not in queued:
+                        queue.append(other)
+                        queued.add(other)
+        return True
+
+    def revise(self, constraint) -> List[Variable]:
+        """
+        Removes the values of the constraint's unassigned variables that cannot satisfy it.
+
+        Args:
+            constraint (Constraint): The constraint to revise.
+
+        Returns:
+            List[Variable]: The variables whose domain shrank.
+        """
+        revised = []
+        for var in constraint.variables:
+            if var.has_value:
+                continue
+            kept = []
+            for value in var.domain:
+                var.value = value
+                if constraint.is_satisfied():
+                    kept.append(value)
+            var.value = None
+            if len(kept) < len(var.domain):
+                var.domain = kept
+                revised.append(var)
+        return revised
+
     def backtracking(self) -> bool:
         """
         Implements the backtracking algorithm.
@@ -53,17 +118,15 @@ class Solver:
         """
         if self.is_finished():
             return True
-        var = self.problem.get_unassigned_variables()[0]
+        var = next(iter(self.unassigned))
         ordered_values = var.domain
         for value in ordered_values:
-            self.save_domain(self.problem.variables)
-            var.value = value
-            if self.is_consistent(var) and self.forward_check(var): 
+            self.trail.append(None)
+            if self.assign(var, value) and self.is_consistent(var) and self.forward_check(var): 
                 result = self.backtracking()
                 if result:
                     return True
-            var.value = None
-            self.load_domain(self.problem) 
+            self.restore()
         return False
 
     def forward_check(self, var: Variable) -> bool:
@@ -71,24 +134,23 @@ class Solver:
         Implements the Forward Checking algorithm.
 
         """
-        constraints = self.problem.get_constraints(var)
+        constraints = self.var_constraints[var]
 
         for neighbor in var.neighbors:
             if neighbor.has_value:
                 continue
-            tmp = neighbor.domain.copy()
-            for value in tmp:
+            old = neighbor.domain
+            kept = []
+            for value in old:
                 neighbor.value = value
-                for constraint in constraints:
-                    if neighbor in constraint.variables:
-                        if not constraint.is_satisfied():
-                            tmp.remove(value)
-                            break                
+                if all(constraint.is_satisfied() for constraint in constraints if neighbor in constraint.var_set):
+                    kept.append(value)
             neighbor.value = None
-            if len(tmp) == 0:
+            if not kept:
                 return False
-            else:
-                neighbor.domain=tmp              
+            if len(kept) < len(old):
+                self.trail.append((neighbor, old))
+                neighbor.domain = kept
         return True    
 
     def is_consistent(self, var: Variable) -> bool:
@@ -101,18 +163,140 @@ class Solver:
         Returns:
             bool: True if the variable is consistent with all constraints, False otherwise.
         """
-        return all(constraint.is_satisfied() for constraint in self.problem.constraints if var in constraint.variables)
+        return all(constraint.is_satisfied() for constraint in self.var_constraints[var])
+    
+    def assign(self, var: Variable, value) -> bool:
+        """
+        Assigns value to var and records the assignment on the trail.
+
+        Returns:
+            bool: False if a constraint of var became fully assigned and is not satisfied.
+        """
+        var.value = value
+        self.unassigned.pop(var, None)
+        self.trail.append((var, None))
+        return all(constraint.is_satisfied() for constraint in self.var_constraints[var]
+                   if constraint.unassigned_cnt == 0)
+
+    def unassign(self, var: Variable):
+        var.value = None
+        self.unassigned[var] = None
+        # Back to the front: backtracking() picks the first unassigned variable and
+        # undoes its assignments in reverse, which restores its original order
+        self.unassigned.move_to_end(var, last=False)
+
+    def restore(self):
+        """
+        Undoes every assignment and domain reduction recorded on the trail since the last sentinel.
+        """
+        while True:
+            entry = self.trail.pop()
+            if entry is None:
+                return
+            var, domain = entry
+            if domain is None:
+                self.unassign(var)
+            else:
+                var.domain = domain
+
+
+@lru_cache(maxsize=200_000)
+def _definite_cells(fixed_ones: int, fixed_zeros: int, clue: Tuple[int, ...], n: int) -> Optional[Tuple[int, int]]:
+    """
+    Polynomial line solver: finds cells that must be filled or empty.
+    Combines left-to-right and right-to-left reachability over (block, position)
+    states, so a cell is definite when every valid line agrees on it.
+    Runs in O(n * len(clue)) without enumerating lines.
     
-    def save_domain(self, vars: list[Variable]):
-        self.back_up.append([var.domain.copy() for var in vars])
+    Args:
+        fixed_ones: Bitmask of cells already known to be filled
+        fixed_zeros: Bitmask of cells already known to be empty
     
-    def load_domain(self, problem: Problem):
-        domains = self.back_up.pop()
-        for i in range(len(problem.variables)):
-            problem.variables[i].domain = domains[i]
+    Returns:
+        (must_fill, must_empty) bitmasks where bit i refers to cell i,
+        or None if no valid line matches the current state.
+    """
+    full = (1 << n) - 1
+    
+    if not clue:
+        # No filled cells - all must be empty
+        if fixed_ones:
+            return None
+        return 0, full
+    
+    k = len(clue)
+    blocks = [(1 << length) - 1 for length in clue]
+    
+    def fits(b, start):
+        """Block b can be placed at start (with the cell after it left empty)"""
+        end = start + clue[b]
+        if end > n or (fixed_zeros >> start) & blocks[b]:
+            return False
+        return end == n or not (fixed_ones >> end) & 1
+    
+    left = _leftmost(fixed_ones, clue, n, fits)
+    right = _rightmost(fixed_ones, clue, n, fits)
+    
+    if not left[k][n]:
+        # No valid solution - contradiction
+        return None
+    
+    can_fill = 0
+    can_empty = 0
+    for i in range(n):
+        if not (fixed_ones >> i) & 1 and any(left[b][i] and right[b][i + 1] for b in range(k + 1)):
+            can_empty |= 1 << i
+    for b in range(k):
+        for start in range(n - clue[b] + 1):
+            end = start + clue[b]
+            if left[b][start] and fits(b, start) and right[b + 1][min(end + 1, n)]:
+                can_fill |= blocks[b] << start
+                if end < n:
+                    # The separating cell after the block
+                    can_empty |= 1 << end
+    
+    return ~can_empty & full, ~can_fill & full
+
+
+def _leftmost(fixed_ones: int, clue: Tuple[int, ...], n: int, fits) -> List[List[bool]]:
+    """
+    left[b][i] is True if the first i cells can hold exactly the first b blocks
+    and a new block may start at cell i.
+    """
+    k = len(clue)
+    left = [[False] * (n + 1) for _ in range(k + 1)]
+    left[0][0] = True
+    for b in range(k + 1):
+        row = left[b]
+        for i in range(n + 1):
+            if not row[i]:
+                continue
+            if i < n and not (fixed_ones >> i) & 1:
+                row[i + 1] = True
+            if b < k and fits(b, i):
+                left[b + 1][min(i + clue[b] + 1, n)] = True
+    return left
 
 
-class FastNonogramSolver:
+def _rightmost(fixed_ones: int, clue: Tuple[int, ...], n: int, fits) -> List[List[bool]]:
+    """
+    right[b][i] is True if the cells from i onwards can hold exactly the blocks
+    from b onwards, given a block may start at cell i.
+    """
+    k = len(clue)
+    right = [[False] * (n + 1) for _ in range(k + 1)]
+    right[k][n] = True
+    for b in range(k, -1, -1):
+        row = right[b]
+        for i in range(n - 1, -1, -1):
+            if not (fixed_ones >> i) & 1 and row[i + 1]:
+                row[i] = True
+            elif b < k and fits(b, i) and right[b + 1][min(i + clue[b] + 1, n)]:
+                row[i] = True
+    return right
+
+
+class FastNonogramSolver(Solver):
     """
     fast Nonogram solver using line-solving techniques.
     This uses constraint propagation without backtracking when possible.
@@ -120,7 +304,7 @@ class FastNonogramSolver:
     """
     
     def __init__(self, problem):
-        self.problem = problem
+        super().__init__(problem)
         self.rows = problem.rows if hasattr(problem, 'rows') else problem.size
         self.cols = problem.cols if hasattr(problem, 'cols') else problem.size
         self.grid = problem.grid
@@ -135,38 +319,29 @@ class FastNonogramSolver:
         
         print(f"Starting to solve {self.rows}x{self.cols} nonogram...")
         
-        # Iterative constraint propagation
-        changed = True
-        self.iterations = 0
+        # Lines fully determined by their clue are filled in once, up front
+        if not self._apply_forced_lines():
+            print(f'✗ Contradiction between forced lines after {(time.time() - start) * 1000:.2f} ms - no solution')
+            return False
         
-        while changed:
-            changed = False
-            self.iterations += 1
-            
-            # Process each constraint (row and column)
-            for constraint in self.constraints:
-                if self._solve_line(constraint):
-                    changed = True
-            
-            # Print progress
-            filled = sum(1 for v in self.problem.variables if v.has_value)
-            total = len(self.problem.variables)
-            print(f"Iteration {self.iterations}: {filled}/{total} cells assigned ({100*filled//total}%)")
-            
-            if filled == total:
-                break
-                
-            # Prevent infinite loops
-            if self.iterations > 100:
-                print("Max iterations reached, may need backtracking")
-                break
+        # Constraint propagation over every line (row and column), to a fixpoint
+        # before any branching
+        self.iterations = self._propagate(self.constraints)
+        if self.iterations is None:
+            print(f'✗ Contradiction during propagation after {(time.time() - start) * 1000:.2f} ms - no solution')
+            return False
+        
+        # Print progress
+        total = len(self.problem.variables)
+        filled = total - len(self.unassigned)
+        print(f"Propagation: {self.iterations} line revisions, {filled}/{total} cells assigned ({100*filled//total}%)")
         
         end = time.time()
         time_elapsed = (end - start) * 1000
         
         # Check if solved
-        filled = sum(1 for v in self.problem.variables if v.has_value)
         total = len(self.problem.variables)
+        filled = total - len(self.unassigned)
         
         # Check all constraints
         satisfied = []
@@ -178,7 +353,7 @@ class FastNonogramSolver:
                 unsatisfied.append(i)
         
         if filled == total and len(unsatisfied) == 0:
-            print(f'✓ Solved after {time_elapsed:.2f} ms ({self.iterations} iterations)')
+            print(f'✓ Solved after {time_elapsed:.2f} ms ({self.iterations} line revisions)')
             return True
         else:
             if filled == total:
@@ -201,167 +376,176 @@ class FastNonogramSolver:
                 print(f'✗ Could not complete solution')
                 return False
     
-    def _solve_line(self, constraint) -> bool:
+    def _apply_forced_lines(self) -> bool:
+        """
+        Assigns every line whose clue leaves no slack (see NonogramConstraint.zero_slack).
+        _solve_line never needs to visit these lines afterwards.
+        
+        Returns:
+            bool: False if a forced value conflicts with a cell that already holds
+            the other value, or completes a crossing line against its clue
+        """
+        # Import here to avoid circular dependency
+        from Nonogram.NonogramConstraint import NonogramConstraint
+        
+        for constraint in self.constraints:
+            if not isinstance(constraint, NonogramConstraint) or not constraint.zero_slack:
+                continue
+            for var, value in zip(constraint.variables, constraint.forced_values):
+                if var.has_value:
+                    if var.value != value:
+                        return False
+                elif not self.assign(var, value):
+                    return False
+        
+        return True
+    
+    def _propagate(self, constraints) -> Optional[int]:
+        """
+        Runs the line solver until no line changes, using a worklist of dirty lines
+        (AC-3 style): a line is only revisited after one of its cells was assigned.
+        
+        Args:
+            constraints: The lines to revise first
+            
+        Returns:
+            Number of line revisions performed, or None if some line has no
+            valid placement left
+        """
+        queue = deque(constraints)
+        queued = set(queue)
+        revisions = 0
+        
+        while queue:
+            constraint = queue.popleft()
+            queued.discard(constraint)
+            revisions += 1
+            
+            changed = self._solve_line(constraint)
+            if changed is None:
+                return None
+            for var in changed:
+                for other in self.var_constraints[var]:
+                    if other not in queued:
+                        queue.append(other)
+                        queued.add(other)
+        
+        return revisions
+    
+    def _solve_line(self, constraint) -> Optional[List[Variable]]:
         """
         Solve a single line using fast line-solving algorithm.
-        Returns True if any cells were assigned.
+        Returns the variables that were assigned, or None on a contradiction.
         """
         # Import here to avoid circular dependency
         from Nonogram.NonogramConstraint import NonogramConstraint
         
         if not isinstance(constraint, NonogramConstraint):
-            return False
+            return []
             
-        variables = constraint.variables
-        clue = constraint.clue
-        n = len(variables)
-        
-        # Get current state
-        current = [v.value for v in variables]
+        # If fully assigned or fixed by the clue (see _apply_forced_lines), nothing to do
+        if constraint.unassigned_cnt == 0 or constraint.zero_slack:
+            return []
         
-        # If fully assigned, nothing to do
-        if None not in current:
-            return False
+        variables = constraint.variables
         
-        # Generate all valid completions efficiently
-        definite_filled, definite_empty = self._find_definite_cells(current, clue, n)
+        # The constraint keeps the line state as bitmasks, so nothing is copied here
+        if constraint.placements is not None:
+            definite = constraint.propagate()
+        else:
+            filled = constraint.filled_mask
+            definite = self._find_definite_cells(constraint, filled, constraint.known_mask & ~filled)
         
-        changed = False
+        if definite is None:
+            # No valid solution - contradiction
+            return None
         
-        # Assign definite cells
-        for idx in definite_filled:
-            #TODO: Implement Here!
-            if variables[idx].value is None:
-                variables[idx].value = 1
-                changed = True
+        must_fill, must_empty = definite
+        changed = []
         
-        for idx in definite_empty:
-            #TODO: Implement Here!
-            if variables[idx].value is None:
-                variables[idx].value = 0
-                changed = True
+        # Assign definite cells, visiting only the newly forced ones
+        forced = (must_fill | must_empty) & ~constraint.known_mask
+        while forced:
+            low = forced & -forced
+            forced ^= low
+            var = variables[low.bit_length() - 1]
+            changed.append(var)
+            if not self.assign(var, 1 if must_fill & low else 0):
+                # Completed a crossing line that does not match its clue
+                return None
         
         return changed
     
-    def _find_definite_cells(self, current: List[int], clue: List[int], n: int) -> Tuple[Set[int], Set[int]]:
-        """
-        Fast algorithm to find cells that must be filled or empty.
-        Uses generating all valid solutions and finding common cells.
+    def _find_definite_cells(self, constraint, fixed_ones: int, fixed_zeros: int) -> Optional[Tuple[int, int]]:
         """
-        if not clue:
-            # No filled cells - all must be empty
-            empty = set(i for i in range(n) if current[i] is None)
-            return set(), empty
+        Finds cells of the constraint's line that must be filled or empty, from its
+        surviving placements when it has them, otherwise with _definite_cells whose
+        results are memoized on the line state, since most lines are re-checked
+        unchanged on every propagation pass.
         
-        # Generate all valid lines that match current state
-        valid_lines = self._generate_all_valid_lines(current, clue, n)
-        
-        if not valid_lines:
-            # No valid solution - contradiction
-            return set(), set()
-        
-        definite_filled = set()
-        definite_empty = set()
-        
-        # Find cells that are the same in ALL valid lines
-        for i in range(n):
-            #TODO: Implement Here!
-            if all((s[i] for s in valid_lines)): definite_filled.union(i) 
-            if not any((s[i] for s in valid_lines)):definite_empty.union(i) 
+        Args:
+            constraint: The NonogramConstraint of the line
+            fixed_ones: Bitmask of cells known to be filled
+            fixed_zeros: Bitmask of cells known to be empty
         
-        return definite_filled, definite_empty
-    
-    def _generate_all_valid_lines(self, current: List[int], clue: List[int], n: int, max_solutions=1000) -> List[List[int]]:
-        """
-        Generate all valid line configurations that match the clue and current state.
-        Limit to max_solutions for performance.
+        Returns:
+            (must_fill, must_empty) bitmasks where bit i refers to cell i,
+            or None if no valid line matches the current state.
         """
-        valid_lines = []
-        
-        def place_blocks(pos, clue_idx, line):
-            """Recursively place blocks"""
-            #TODO: Implement Here! (complete the logic for placing blocks recursively)
-            if len(clue) == clue_idx:
-                for i in range(pos, n):
-                    if current[i] == 1:
-                        is_valid = False
-                        return 
-
-                for i in range(pos, n): line[i] = 0
-                valid_lines.append(line)
-                return 
-            
-            remaining_clues = clue[clue_idx:]
-            min_required_space = sum(remaining_clues) + len(remaining_clues) - 1
-
-            if n - pos < min_required_space:
-                return 
-            
-            max_start = n - min_required_space + 1
-
-            for start_pos in range(pos, max_start):
-
-                is_compatible = True
-
-                for i in range(start_pos, start_pos + clue[clue_idx]):
-                    if current[i] == 0:
-                        is_compatible = False
-                        break
-                if not is_compatible: continue
-                
-                for i in range(pos, start_pos):
-                    if current[i] == 1:
-                        is_compatible = False
-                        break
-                if not is_compatible: continue
-
-                if start_pos + clue[clue_idx] != n and current[start_pos + clue[clue_idx]] == 1: continue
-
-
-                new_line = list(line)
-
-                for i in range(pos, start_pos):
-                    new_line[i] = 0
-
-                for i in range(start_pos, start_pos + clue[clue_idx]):
-                    new_line[i] = 1
-
-                if start_pos + clue[clue_idx] != n: new_line[start_pos + clue[clue_idx]] = 0
-                
-                place_blocks(start_pos + clue[clue_idx] + 1, clue_idx + 1, new_line)
-
-        place_blocks(0, 0, [None] * n) 
-        return valid_lines
+        if constraint.placements is not None:
+            return constraint.definite_cells(fixed_ones, fixed_ones | fixed_zeros)
+        return _definite_cells(fixed_ones, fixed_zeros, constraint.clue, constraint.line_length)
     
-    def _mrv_select(self, unassigned: List[Variable]) -> Variable:
+    def _mrv_select(self, unassigned: Iterable[Variable]) -> Variable:
         """
         Implements Minimum Remaining Values heuristic for FastNonogramSolver.
-        Selects the variable with the smallest domain (most constrained).
+        Every cell's domain is [0, 1], so the remaining values are counted per
+        line instead: the open line with the fewest surviving placements is
+        chosen, and in it the cell that splits those placements most evenly
+        (whichever value is tried, about half of them are ruled out).
+        Falls back to the degree heuristic when no line stores its placements.
         
         Args:
-            unassigned: List of unassigned variables
+            unassigned: Unassigned variables
             
         Returns:
-            Variable with smallest domain
+            Variable to branch on
         """
         if not unassigned:
             return None
         
-        # For nonogram, domain is [0, 1], so we need a different metric
-        # We'll count how many constraints affect each variable
-        # and prefer variables that appear in more unsatisfied constraints
-        def constraint_score(var):
-            """Calculate constraint score - higher means more constrained"""
-            #TODO: Implement Here!
-            pass
-        
-        # Sort by most constrained (highest score)
-        return max(unassigned, key=constraint_score)
+        best_line = None
+        best_survivors = None
+        for constraint in self.constraints:
+            if constraint.unassigned_cnt == 0 or getattr(constraint, 'placements', None) is None:
+                continue
+            survivors = constraint.survivors()
+            if best_survivors is None or len(survivors) < len(best_survivors):
+                best_line, best_survivors = constraint, survivors
+        
+        if best_line is None:
+            # Prefer cells crossing more open cells, counted only on this rare path
+            return min(unassigned, key=lambda var: (len(var.domain),
+                                                    -sum(1 for n in var.neighbors if not n.has_value)))
+        
+        total = len(best_survivors)
+        best_var = None
+        best_split = None
+        for i, var in enumerate(best_line.variables):
+            if var.has_value:
+                continue
+            bit = 1 << i
+            filled = sum(1 for p in best_survivors if p & bit)
+            split = abs(2 * filled - total)
+            if best_split is None or split < best_split:
+                best_var, best_split = var, split
+        return best_var
     
     def _lcv_order(self, var: Variable) -> List[int]:
         """
         Implements Least Constraining Value heuristic for FastNonogramSolver.
-        Orders domain values [0, 1] by how many conflicts they cause.
+        Orders domain values [0, 1] by how many placements of var's lines
+        survive each of them (the product over the row and the column), most first.
         
         Args:
             var: Variable to order values for
@@ -369,95 +553,56 @@ class FastNonogramSolver:
         Returns:
             List of values ordered by least constraining first
         """
-        #TODO: Implement Here!
-        pass
+        kept = {0: 1, 1: 1}
+        for constraint in self.var_constraints[var]:
+            if getattr(constraint, 'placements', None) is None:
+                continue
+            bit = 1 << constraint.variables.index(var)
+            survivors = constraint.survivors()
+            filled = sum(1 for p in survivors if p & bit)
+            kept[1] *= filled
+            kept[0] *= len(survivors) - filled
+        return sorted(var.domain, key=lambda value: -kept.get(value, 0))
     
     def _forward_check(self, var: Variable) -> bool:
         """
         Implements Forward Checking for FastNonogramSolver.
-        After assigning a value to var, checks if any constraint involving var
-        would eliminate all possible values for unassigned variables.
+        After assigning a value to var, line-solves every line through var and
+        propagates the cells it forces to their crossing lines until nothing
+        changes. Forced cells are assigned on the trail, so restore() undoes them
+        together with var.
         
         Args:
             var: The variable that was just assigned
             
         Returns:
-            bool: True if forward checking passes (no domain wipeout), False otherwise
+            bool: True if forward checking passes (no line left without a placement), False otherwise
         """
-        # Get constraints that involve the assigned variable
-        related_constraints = [c for c in self.constraints if var in c.variables]
-        
-        # For each constraint, check if unassigned variables in it still have valid values
-        for constraint in related_constraints:
-            unassigned_in_constraint = [v for v in constraint.variables if not v.has_value]
-            
-            for unassigned_var in unassigned_in_constraint:
-                # Check if this unassigned variable has any valid value
-                has_valid_value = False
-                
-                for test_value in [0, 1]:
-                    unassigned_var.value = test_value
-                    
-                    # Check if constraint can still be satisfied
-                    if constraint.is_satisfied():
-                        has_valid_value = True
-                        unassigned_var.value = None
-                        break
-                    
-                    unassigned_var.value = None
-                
-                # If no valid value exists for this variable, forward check fails
-                if not has_valid_value:
-                    return False
-        
-        return True
+        return self._propagate(self.var_constraints[var]) is not None
     
     def _backtrack(self) -> bool:
         """
         Backtracking with MRV and LCV heuristics for remaining unassigned cells.
         Uses Minimum Remaining Values to select variables and Least Constraining Value to order domain values.
         """
-        #TODO: use your mrv and lcv here!
-        
-        # Find unassigned variables
-        unassigned = [v for v in self.problem.variables if not v.has_value]
-        
         # If all assigned, check if satisfied
-        if not unassigned:
+        if not self.unassigned:
             return all(c.is_satisfied() for c in self.constraints)
         
-        # Select the first unassigned variable
-        # var = unassigned[0]
-        var = self._mrv_select(unassigned)
-        
-        # Default order
-        # ordered_values = [0, 1]
+        # Branch on the most discriminating cell of the most constrained line
+        var = self._mrv_select(self.unassigned)
         ordered_values = self._lcv_order(var)
         
         # Try values in order
         for value in ordered_values:
-            var.value = value
+            self.trail.append(None)
             
-            # Check constraints involving this variable
-            related_constraints = [c for c in self.constraints if var in c.variables]
-            
-            # Check if assignment satisfies constraints and passes forward checking
-            if all(c.is_satisfied() for c in related_constraints) and self._forward_check(var):
-                # Try propagation
-                changed = True
-                iterations = 0
-                while changed and iterations < 3:
-                    changed = False
-                    iterations += 1
-                    for c in self.constraints:
-                        if self._solve_line(c):
-                            changed = True
-                
-                # Recurse
-                if self._backtrack():
-                    return True
+            # assign() checks the lines var completes; forward checking line-solves
+            # the rest to a fixpoint before branching any further
+            if self.assign(var, value) and self._forward_check(var) and self._backtrack():
+                return True
             
-            # Backtrack - unassign
-            var.value = None
+            # Backtrack - unassign var and everything propagated from it
+            self.restore()
         
         return False
@@ -4,9 +4,8 @@ T = TypeVar('T')
 
 
 class Variable(Generic[T]):
-    _value: T = None
-    _has_value: bool = False
-    _has_initial_value = False
+    __slots__ = ('_value', '_has_value', '_has_initial_value', '_domain', 'name', 'neighbors',
+                 '_watchers')
 
     def __init__(self, domain: List[T], name: str = None, initial_value: T = None):
         self._has_initial_value = initial_value is not None
@@ -15,6 +14,7 @@ class Variable(Generic[T]):
         self._domain = domain
         self.name = name
         self.neighbors = set({})
+        self._watchers = []
 
     @property
     def value(self) -> T:
@@ -24,6 +24,7 @@ class Variable(Generic[T]):
     def value(self, x: T):
         if x == self._value:
             return
+        old = self._value
         if x in self._domain and x is not None:
             self._value = x
             self._has_value = True
@@ -32,6 +33,12 @@ class Variable(Generic[T]):
             self._value = x
         else:
             raise Exception("Value is not in the domain")
+        for constraint, index in self._watchers:
+            constraint.notify(index, old, x)
+
+    def watch(self, constraint, index: int):
+        """Calls constraint.notify(index, old, new) whenever the value changes."""
+        self._watchers.append((constraint, index))
 
     @property
     def domain(self) -> List[T]:
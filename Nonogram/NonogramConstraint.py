@@ -1,7 +1,73 @@
+from collections import OrderedDict
+from itertools import combinations
+from math import comb
 from typing import List, Set, Tuple
 from CSP.Constraint import Constraint
 from CSP.Variable import Variable
 
+# Lines with more placements than this are checked with the DP instead of a stored list
+MAX_PLACEMENTS = 100_000
+
+# Partial-consistency results remembered per line (least recently used are evicted)
+PARTIAL_CACHE_SIZE = 65_536
+
+# Lines with at most this many placements get a generated, unrolled partial check
+SPECIALIZE_MAX_PLACEMENTS = 64
+
+
+def _compile_check(placements: List[int]):
+    """
+    Builds check(filled, known) -> bool that tests the given placements one after
+    another as constants in a single expression, with no loop or attribute loads.
+    """
+    terms = " or ".join(f"{p} & km == kf" for p in placements) or "False"
+    namespace = {}
+    exec(f"def check(kf, km):\n    return {terms}\n", namespace)
+    return namespace['check']
+
+
+def _dp_check_possible(filled: int, known: int, n: int, clue: Tuple[int, ...]) -> bool:
+    """
+    Single left-to-right sweep over (cell, block) states, kept as bitsets:
+    bit j of reach[i] is set if the first i cells can hold exactly the first j
+    blocks with a new block free to start at cell i. Leaving a cell empty
+    carries every state forward with one int operation.
+    
+    The line is read from its bitboard (bit i of filled set when cell i is 1,
+    of known when it has any value), so no per-cell list is built.
+    """
+    m = len(clue)
+    empty = known & ~filled
+    reach = [0] * (n + 1)
+    reach[0] = 1
+    
+    for i in range(n):
+        states = reach[i]
+        if not states:
+            continue
+        # Leave cell i empty
+        if not (filled >> i) & 1:
+            reach[i + 1] |= states
+        # Start block j at cell i, for every reachable j
+        while states:
+            low = states & -states
+            j = low.bit_length() - 1
+            states ^= low
+            if j == m:
+                break
+            block_len = clue[j]
+            end = i + block_len
+            # The block fits on cells [i, end) if none of them is known empty
+            if end > n or empty & (((1 << block_len) - 1) << i):
+                continue
+            if end == n:
+                reach[n] |= low << 1
+            elif not (filled >> end) & 1:
+                # The cell after the block is its separator
+                reach[end + 1] |= low << 1
+    
+    return (reach[n] >> m) & 1 == 1
+
 
 class NonogramConstraint(Constraint):
     """
@@ -9,6 +75,10 @@ class NonogramConstraint(Constraint):
     Checks if the sequence of filled cells matches the given clue.
     Optimized with line-solving techniques.
     """
+    __slots__ = ('clue', 'line_length', 'min_length', 'total_filled_needed', 'total_empty_needed',
+                 'max_block', 'full_mask', 'filled_mask', 'known_mask', 'filled_count', 'empty_count',
+                 'zero_slack', 'forced_values',
+                 'placements', 'placements_set', 'alive', '_cache', '_fast_check')
     
     def __init__(self, variables: List[Variable], clue: List[int]):
         """
@@ -18,9 +88,83 @@ class NonogramConstraint(Constraint):
                   e.g., [2, 3] means 2 filled cells, then 3 filled cells with at least 1 gap
         """
         super().__init__(variables)
-        self.clue = clue
+        self.clue = tuple(clue)
         self.line_length = len(variables)
         self.min_length = sum(clue) + len(clue) - 1
+        self.total_filled_needed = sum(clue)
+        self.total_empty_needed = self.line_length - self.total_filled_needed
+        self.max_block = max(clue, default=0)
+        
+        # A clue that leaves no room to move (or an empty clue) fixes the whole line
+        self.zero_slack = not self.clue or self.min_length == self.line_length
+        self.forced_values = None
+        if self.zero_slack:
+            self.forced_values = []
+            for i, block in enumerate(self.clue):
+                if i:
+                    self.forced_values.append(0)
+                self.forced_values.extend([1] * block)
+            self.forced_values.extend([0] * (self.line_length - len(self.forced_values)))
+        
+        # Every way to place the clue in the line, as filled-cell bitmasks
+        slack = self.line_length - max(self.min_length, 0)
+        if slack >= 0 and comb(slack + len(self.clue), len(self.clue)) <= MAX_PLACEMENTS:
+            self.placements = self._enumerate_masks(self.line_length, self.clue)
+            self.placements_set = frozenset(self.placements)
+        else:
+            self.placements = None
+            self.placements_set = None
+        
+        # Few placements: a generated check replaces the scan over them
+        self._fast_check = None
+        if self.placements is not None and len(self.placements) <= SPECIALIZE_MAX_PLACEMENTS:
+            self._fast_check = _compile_check(self.placements)
+        
+        # Stamp trail of (known_mask, filled_mask, surviving placements), each entry
+        # knowing more cells than the one below it; entries are dropped lazily once
+        # cells they relied on get unassigned
+        self.alive = [(0, 0, self.placements)]
+        
+        # (known_mask, filled_mask) -> result of _is_partially_consistent
+        self._cache = OrderedDict()
+        
+        # Bitboard of the line: bit i of filled_mask is set when variables[i] is 1,
+        # bit i of known_mask when variables[i] has any value
+        self.full_mask = (1 << self.line_length) - 1
+        self.filled_mask = 0
+        self.known_mask = 0
+        for i, var in enumerate(variables):
+            if var.has_value:
+                self.known_mask |= 1 << i
+                if var.value == 1:
+                    self.filled_mask |= 1 << i
+        
+        # Number of cells assigned 1 and 0, kept alongside the bitboard
+        self.filled_count = self.filled_mask.bit_count()
+        self.empty_count = (self.known_mask & ~self.filled_mask).bit_count()
+    
+    def notify(self, index: int, old, new):
+        """
+        Keeps the bitboard and cell counts in sync when variables[index] changes value.
+        """
+        super().notify(index, old, new)
+        if old == 1:
+            self.filled_count -= 1
+        elif old == 0:
+            self.empty_count -= 1
+        if new == 1:
+            self.filled_count += 1
+        elif new == 0:
+            self.empty_count += 1
+        bit = 1 << index
+        if new is None:
+            self.known_mask &= ~bit
+        else:
+            self.known_mask |= bit
+        if new == 1:
+            self.filled_mask |= bit
+        else:
+            self.filled_mask &= ~bit
     
     def is_satisfied(self) -> bool:
         """
@@ -28,81 +172,169 @@ class NonogramConstraint(Constraint):
         Returns True if all variables are assigned and match the clue,
         or if not all variables are assigned yet (partial consistency check).
         """
-        # Get the values of all variables (None if unassigned, 0 or 1 if assigned)
-        values = [var.value for var in self.variables]
+        # All variables assigned - check full consistency
+        if self.unassigned_cnt == 0:
+            return self._matches_clue(self.filled_mask)
+        
+        # One cell left (the common case while forward checking) - try both completions
+        if self.unassigned_cnt == 1:
+            unknown = self.full_mask & ~self.known_mask
+            return self._matches_clue(self.filled_mask) or self._matches_clue(self.filled_mask | unknown)
         
         # If not all variables are assigned, check partial consistency
-        if None in values:
-            return self._is_partially_consistent(values)
+        return self._is_partially_consistent()
+    
+    def _is_partially_consistent(self) -> bool:
+        """
+        Memoized on the line's bitboard: backtracking revisits the same partial
+        lines over and over.
+        """
+        key = (self.known_mask, self.filled_mask)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
         
-        # All variables assigned - check full consistency
-        return self._matches_clue(values)
+        result = self._check_partial()
+        self._cache[key] = result
+        if len(self._cache) > PARTIAL_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return result
     
-    def _is_partially_consistent(self, values: List[int]) -> bool:
+    def _check_partial(self) -> bool:
         
-        if not self.clue:
-            
-            return all(v != 1 for v in values)
+        # Cheap necessary conditions before the full check
+        if self.filled_count > self.total_filled_needed:
+            return False
+        if self.empty_count > self.total_empty_needed:
+            return False
+        run = self.filled_mask
+        for _ in range(self.max_block):
+            run &= run >> 1
+        if run:
+            # Some run of filled cells is longer than every block
+            return False
         
+        if self.placements is None:
+            return _dp_check_possible(self.filled_mask, self.known_mask, self.line_length, self.clue)
         
-        if not self.clue:
-            return all(v != 1 for v in values)
-    
-        line = ''.join(['1' if v == 1 else '0' if v == 0 else '?' for v in values])
-        possible_placements = self._generate_possible_placements(len(values), self.clue)
-    
-        for placement in possible_placements:
-            if self._placement_matches(line, placement):
+        # filled_mask is a subset of known_mask, so p agrees with every known
+        # cell exactly when p & known_mask == filled_mask
+        kf = self.filled_mask
+        km = self.known_mask
+        if self._fast_check is not None:
+            return self._fast_check(kf, km)
+        for p in self._alive_placements(kf, km):
+            if p & km == kf:
                 return True
         return False
-    def _generate_possible_placements(self, length: int, clue: List[int]) -> List[str]:
-        placements = []
-        self._generate_placements_recursive(length, clue, 0, 0, [], placements)
-        return placements
     
-    def _generate_placements_recursive(self, length: int, clue: List[int], clue_idx: int, 
-                                      position: int, current: List[str], placements: List[str]):
-        if clue_idx == len(clue):
-            placements.append(''.join(current) + '0' * (length - position))
-            return
-        
-        clue_size = clue[clue_idx]
-        
-        for start in range(position, length - clue_size + 1):
-            if '0' in ''.join(current)[start:start + clue_size]:
-                continue
-                
-            new_current = current + ['0' * (start - position)] + ['1' * clue_size]
-            
-            if clue_idx < len(clue) - 1:
-                new_current.append('0')
-                next_position = start + clue_size + 1
-            else:
-                next_position = start + clue_size
-            
-            self._generate_placements_recursive(length, clue, clue_idx + 1, next_position, new_current, placements)
-    
-    def _placement_matches(self, line: str, placement: str) -> bool:
-        for i in range(len(line)):
-            if line[i] == '?':
-                continue
-            if line[i] != placement[i]:
-                return False
-        return True
-    def _matches_clue(self, values: List[int]) -> bool:
-        
-        line_str = ''.join(['1' if v == 1 else '0' for v in values])
-        
-        if not self.clue:
-            return all(v == 0 for v in values)
+    def _alive_placements(self, filled: int, known: int) -> List[int]:
+        """
+        Placements from the deepest trail entry that still agrees with the given line state.
+        Every placement consistent with the state is among them.
+        """
+        alive = self.alive
+        while len(alive) > 1:
+            k, f, _ = alive[-1]
+            if k & ~known == 0 and filled & k == f:
+                break
+            alive.pop()
+        return alive[-1][2]
+    
+    def definite_cells(self, filled: int, known: int):
+        """
+        Line solver over the surviving placements: a cell is forced to 1 if every
+        consistent placement fills it and forced to 0 if none does.
         
-        groups = [group for group in line_str.split('0') if group]
+        Args:
+            filled: Bitmask of cells known to be filled
+            known: Bitmask of cells with a known value
         
-        if len(groups) != len(self.clue):
-            return False
+        Returns:
+            (must_fill, must_empty) bitmasks, or None if no placement is consistent.
+        """
+        survivors = [p for p in self._alive_placements(filled, known) if p & known == filled]
+        if not survivors:
+            return None
+        return self._reduce(survivors)
+    
+    def survivors(self) -> List[int]:
+        """
+        Placements consistent with the current assignment, or None if the line
+        has no stored placements (see MAX_PLACEMENTS).
+        """
+        if self.placements is None:
+            return None
+        filled = self.filled_mask
+        known = self.known_mask
+        return [p for p in self._alive_placements(filled, known) if p & known == filled]
+    
+    def propagate(self):
+        """
+        Like definite_cells for the current assignment, but also records the
+        surviving placements on the trail so later checks only scan those.
+        """
+        filled = self.filled_mask
+        known = self.known_mask
+        alive = self._alive_placements(filled, known)
+        k, f, _ = self.alive[-1]
+        if k != known or f != filled:
+            alive = [p for p in alive if p & known == filled]
+            if not alive:
+                return None
+            self.alive.append((known, filled, alive))
+        return self._reduce(alive)
+    
+    def _reduce(self, survivors: List[int]) -> Tuple[int, int]:
+        forced_ones = survivors[0]
+        any_ones = survivors[0]
+        for p in survivors[1:]:
+            forced_ones &= p
+            any_ones |= p
+        return forced_ones, ~any_ones & self.full_mask
+    
+    def _enumerate_masks(self, n: int, clue: Tuple[int, ...]) -> List[int]:
+        """
+        All placements of the clue in a line of n cells, as bitmasks of filled cells.
+        Stars and bars: the slack (cells not needed by blocks or their single gaps)
+        is spread over the k + 1 gaps, which is the same as choosing which k of
+        slack + k slots hold a block; block i then starts at slot + sum(clue[:i]).
+        """
+        k = len(clue)
+        slack = n - sum(clue) - max(0, k - 1)
+        blocks = [(1 << length) - 1 for length in clue]
+        offsets = [0] * k
+        for i in range(1, k):
+            offsets[i] = offsets[i - 1] + clue[i - 1]
         
-        for i in range(len(groups)):
-            if len(groups[i]) != self.clue[i]:
-                return False
+        placements = []
+        for slots in combinations(range(slack + k), k):
+            mask = 0
+            for i in range(k):
+                mask |= blocks[i] << (slots[i] + offsets[i])
+            placements.append(mask)
+        return placements
+    
+    def _matches_clue(self, filled: int) -> bool:
+        """
+        Check whether a fully assigned line, given as its filled-cell bitmask, matches the clue.
+        """
+        if self.placements_set is not None:
+            return filled in self.placements_set
+        return self._runs(filled) == self.clue
+    
+    @staticmethod
+    def _runs(ones: int) -> Tuple[int, ...]:
+        """
+        Lengths of the runs of set bits in ones, from the lowest bit up.
+        """
+        blocks = []
+        while ones:
+            # Skip to the lowest filled cell, then measure the run starting there
+            ones >>= (ones & -ones).bit_length() - 1
+            width = (~ones & (ones + 1)).bit_length() - 1
+            blocks.append(width)
+            ones >>= width
         
-        return True
\ No newline at end of file
+        return tuple(blocks)
@@ -1,8 +1,12 @@
+import sys
 from typing import List
 from CSP.Problem import Problem
 from CSP.Variable import Variable
 from Nonogram.NonogramConstraint import NonogramConstraint
 
+# How print_board draws a cell for each value
+CELL_CHARS = {1: '█', 0: '░', None: '·'}
+
 
 class NonogramProblem(Problem):
     """
@@ -86,74 +90,38 @@ class NonogramProblem(Problem):
     
     def _create_grid_and_constraints(self, row_clues, column_clues):
         """Create the grid variables and constraints."""
-        self.grid = []
-        for row in range(self.rows):
-            row_vars = []
-            for col in range(self.cols):
-                var = Variable(f"Cell_{row}_{col}", [0, 1])
-                row_vars.append(var)
-                self.variables.append(var)
-            self.grid.append(row_vars)
+        self.grid = [[Variable([0, 1], f"Cell_{row}_{col}") for col in range(self.cols)]
+                     for row in range(self.rows)]
+        self.variables = [var for row_vars in self.grid for var in row_vars]
         
-        for row in range(self.rows):
-            row_vars = self.grid[row]
-            constraint = NonogramConstraint(row_vars, row_clues[row])
-            self.constraints.append(constraint)
-            for var in row_vars:
-                var.add_constraint(constraint)
+        # Rows and columns are views over the same Variable objects
+        self.constraints = [NonogramConstraint(row_vars, clue) for row_vars, clue in zip(self.grid, row_clues)]
+        self.constraints += [NonogramConstraint([row_vars[col] for row_vars in self.grid], clue)
+                             for col, clue in enumerate(column_clues)]
         
-        for col in range(self.cols):
-            col_vars = [self.grid[row][col] for row in range(self.rows)]
-            constraint = NonogramConstraint(col_vars, column_clues[col])
-            self.constraints.append(constraint)
-            for var in col_vars:
-                var.add_constraint(constraint)
+        self.calculate_neighbors()
     
     def print_board(self):
         """
         Print the current state of the nonogram board.
         Uses █ for filled cells (1), ░ for empty cells (0), and · for unassigned cells.
+        The whole board is built first and written with a single call.
         """
-        print(f"\n{self.name} - Current Board ({self.rows}x{self.cols}):")
+        lines = [f"\n{self.name} - Current Board ({self.rows}x{self.cols}):"]
         
         # Print column numbers header
         if self.cols <= 20:
             # Small board - use spaced format
-            print("  ", end="")
-            for col in range(self.cols):
-                print(f" {col}", end="")
-            print()
-            
+            lines.append("  " + "".join(f" {col}" for col in range(self.cols)))
             for row in range(self.rows):
-                print(f"{row:2d}", end="")
-                for col in range(self.cols):
-                    value = self.grid[row][col].value
-                    if value == 1:
-                        print(" █", end="")
-                    elif value == 0:
-                        print(" ░", end="")
-                    else:
-                        print(" ·", end="")
-                print()
+                lines.append(f"{row:2d}" + "".join(f" {CELL_CHARS[var.value]}" for var in self.grid[row]))
         else:
             # Large board - use compact format
-            print("    ", end="")
-            for col in range(self.cols):
-                print(f"{col%10}", end="")
-            print()
-            
+            lines.append("    " + "".join(f"{col%10}" for col in range(self.cols)))
             for row in range(self.rows):
-                print(f"{row:2d} ", end="")
-                for col in range(self.cols):
-                    value = self.grid[row][col].value
-                    if value == 1:
-                        print("█", end="")
-                    elif value == 0:
-                        print("░", end="")
-                    else:
-                        print("·", end="")
-                print()
-        print()
+                lines.append(f"{row:2d} " + "".join(CELL_CHARS[var.value] for var in self.grid[row]))
+        
+        sys.stdout.write("\n".join(lines) + "\n\n")
     
     def print_assignments(self):
         """
@@ -2,6 +2,8 @@ from CSP.Constraint import Constraint
 
 
 class StatesNotSameConstraint(Constraint):
+    __slots__ = ()
+
     def is_satisfied(self) -> bool:
         list_of_values = [x.value for x in self.variables if x.value is not None]
         return len(list_of_values) == len(set(list_of_values))
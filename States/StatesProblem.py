@@ -35,3 +35,4 @@ class StatesProblem(Problem):
 
         self.constraints = [c1, c2, c3, c4, c5, c6, c7, c8, c9]
         self.variables = [wa, nt, sa, q, nsw, v, t]
+        self.calculate_neighbors()